@@ -1,25 +1,56 @@
 # backend/main.py
 
-import json
-import tempfile
+import asyncio
+import io
+import logging
+import os
+import queue
 import zipfile
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
-from typing import Any, Dict
+from typing import AsyncIterator, Dict, Iterable, Iterator
 from uuid import uuid4
 
-from fastapi import FastAPI, HTTPException, Request
+import aiofiles
+import aiofiles.os
+import msgspec
+import orjson
+from fastapi import BackgroundTasks, FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, RedirectResponse, Response
+from fastapi.responses import (FileResponse, RedirectResponse, Response,
+                               StreamingResponse)
 from fastapi.staticfiles import StaticFiles
 from models import (AnswerUpload, BaselineUpload, ConsentRequest,
-                    FollowupResponse, Question, SessionConfig, SessionSummary,
-                    SurveyResponse)
-from services.openai_llm import generate_followup, pick_three_questions
-from services.tts_openai import AUDIO_DIR, synthesize_tts
-from starlette.background import BackgroundTask
+                    FollowupResponse, Question, Session, SessionConfig,
+                    SessionSummary, SurveyResponse)
+from pydantic import BaseModel
+from redis.asyncio import Redis
+from services.http_client import http_client
+from services.openai_llm import (FALLBACK_FOLLOWUPS, GENERAL_QUESTIONS,
+                                 generate_followup, pick_three_questions)
+from services.tts_openai import (AUDIO_DIR, AUDIO_MEDIA_TYPE, CAN_CONCAT_AUDIO,
+                                 cached_clip_path, cancel_prefetch,
+                                 drain_scheduled, prefetch_tts, schedule_tts,
+                                 synthesize_tts, synthesize_tts_stream,
+                                 wait_for_clip, warm_tts)
+
+# QueueHandler still formats each record in the thread that logs it; only the
+# stream write moves to the listener thread, so a slow stdout never stalls the
+# event loop. Once shutdown stops the listener, records still logged (e.g. by
+# late background tasks) are left in the queue and never written.
+_LOG_QUEUE: queue.SimpleQueue = queue.SimpleQueue()
+_log_handler = logging.StreamHandler()
+_log_handler.setFormatter(
+    logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+)
+_log_listener = QueueListener(_LOG_QUEUE, _log_handler)
+logging.getLogger().addHandler(QueueHandler(_LOG_QUEUE))
+logging.getLogger().setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+logging.getLogger("httpx").setLevel(logging.WARNING)  # one line per API call
+_log_listener.start()
+log = logging.getLogger(__name__)
 
 app = FastAPI()
-app.mount("/audio", StaticFiles(directory=AUDIO_DIR), name="audio")
 
 
 app.add_middleware(
@@ -34,170 +65,399 @@ DATA_DIR = Path("data/sessions")
 DATA_DIR.mkdir(parents=True, exist_ok=True)
 
 
-SESSIONS: Dict[str, Dict[str, Any]] = {}
-WORK_SUFFIX = ".work.json"
+SESSIONS: Dict[str, Session] = {}
+WORK_SUFFIX = ".work.mpack"
+# Work files from before the msgpack switch may still sit on the data disk.
+LEGACY_WORK_SUFFIX = ".work.json"
+SURVEY_SUFFIX = ".survey.json"
+
+# Mutations only mark a session dirty; _flush_loop persists them in batches.
+_DIRTY: set[str] = set()
+_FLUSH_LOCK = asyncio.Lock()
+SESSION_FLUSH_INTERVAL = float(os.getenv("SESSION_FLUSH_INTERVAL", "2"))
+
+# With REDIS_URL set, session state lives in Redis so every worker sees it;
+# otherwise it stays in SESSIONS with the work files as a restart backstop.
+REDIS_URL = os.getenv("REDIS_URL")
+SESSION_TTL_SEC = int(os.getenv("SESSION_TTL_SEC", "3600"))
+redis = Redis.from_url(REDIS_URL) if REDIS_URL else None
 
 FRONTEND_DIR = Path(__file__).resolve().parent.parent / "frontend"
 
 
+_BACKGROUND_TASKS: set[asyncio.Task] = set()
+
+
+async def _prewarm_question_audio() -> None:
+    await asyncio.gather(
+        *(warm_tts(text) for text in GENERAL_QUESTIONS)
+    )
+    log.info("[TTS] Pre-warmed %d question clips", len(GENERAL_QUESTIONS))
+
+
+async def _flush_loop() -> None:
+    while True:
+        await asyncio.sleep(SESSION_FLUSH_INTERVAL)
+        await _flush_dirty()
+
+
+@app.on_event("startup")
+async def _start_background_tasks() -> None:
+    for coro in (_prewarm_question_audio(), _flush_loop()):
+        task = asyncio.create_task(coro)
+        _BACKGROUND_TASKS.add(task)
+        task.add_done_callback(_BACKGROUND_TASKS.discard)
+
+
+@app.on_event("shutdown")
+async def _drain_sessions() -> None:
+    for task in list(_BACKGROUND_TASKS):
+        task.cancel()
+    await _flush_dirty()
+
+
+@app.on_event("shutdown")
+async def _close_http_client() -> None:
+    await http_client.aclose()
+    if redis is not None:
+        await redis.aclose()
+
+
+@app.on_event("shutdown")
+async def _stop_log_listener() -> None:
+    # Flushes what is queued so far; anything logged after this is dropped.
+    _log_listener.stop()
+
+
 def _work_path(session_id: str) -> Path:
     return DATA_DIR / f"{session_id}{WORK_SUFFIX}"
 
 
-def _get_session(session_id: str) -> Dict[str, Any] | None:
+def _survey_path(session_id: str) -> Path:
+    return DATA_DIR / f"{session_id}{SURVEY_SUFFIX}"
+
+
+def _summary_paths() -> list[Path]:
+    return sorted(
+        p
+        for p in DATA_DIR.glob("*.json")
+        if not p.name.endswith((WORK_SUFFIX, LEGACY_WORK_SUFFIX, SURVEY_SUFFIX))
+    )
+
+
+def _merged_summary(path: Path) -> bytes | None:
+    """Summary JSON with its survey sidecar folded in; None if no survey."""
+    survey_path = _survey_path(path.stem)
+    if not survey_path.exists():
+        return None
+    data = orjson.loads(path.read_bytes())
+    data["survey"] = orjson.loads(survey_path.read_bytes())
+    return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+
+
+def _enc_hook(obj):
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    raise NotImplementedError(f"Cannot encode {type(obj)!r}")
+
+
+def _dec_hook(type_, obj):
+    if isinstance(type_, type) and issubclass(type_, BaseModel):
+        return type_.model_validate(obj)
+    raise NotImplementedError(f"Cannot decode {type_!r}")
+
+
+# Work state is machine-read only, so it is stored as msgpack rather than JSON.
+_SESSION_ENCODER = msgspec.msgpack.Encoder(enc_hook=_enc_hook)
+_SESSION_DECODER = msgspec.msgpack.Decoder(Session, dec_hook=_dec_hook)
+
+
+def _encode_session(sess: Session) -> bytes:
+    return _SESSION_ENCODER.encode(sess)
+
+
+def _decode_session(raw: bytes) -> Session:
+    return _SESSION_DECODER.decode(raw)
+
+
+def _redis_key(session_id: str) -> str:
+    return f"session:{session_id}"
+
+
+async def _get_session(session_id: str) -> Session | None:
+    if redis is not None:
+        raw = await redis.get(_redis_key(session_id))
+        return _decode_session(raw) if raw is not None else None
+
     sess = SESSIONS.get(session_id)
     if sess:
         return sess
     wp = _work_path(session_id)
     if wp.exists():
         try:
-            with wp.open("r", encoding="utf-8") as f:
-                data = json.load(f)
-            SESSIONS[session_id] = data
-            return data
+            async with aiofiles.open(wp, "rb") as f:
+                sess = _decode_session(await f.read())
+            SESSIONS[session_id] = sess
+            return sess
         except Exception as e:
-            print(f"[SESSION] Failed to load work file {wp}: {e!r}")
+            log.error("[SESSION] Failed to load work file %s: %r", wp, e)
     return None
 
 
-def _save_session(session_id: str, sess: Dict[str, Any]) -> None:
+async def _put_session(session_id: str, sess: Session) -> None:
+    if redis is not None:
+        await redis.setex(_redis_key(session_id), SESSION_TTL_SEC, _encode_session(sess))
+        return
+
+    SESSIONS[session_id] = sess
+    _DIRTY.add(session_id)
+
+
+async def _drop_session(session_id: str) -> None:
+    if redis is not None:
+        await redis.delete(_redis_key(session_id))
+        return
+
+    # The work file goes in the same critical section: left for later, a
+    # request in between (e.g. a survey) would reload the session from it
+    # and the flush loop would write it back with nothing left to delete it.
+    async with _FLUSH_LOCK:
+        SESSIONS.pop(session_id, None)
+        _DIRTY.discard(session_id)
+        try:
+            await aiofiles.os.remove(_work_path(session_id))
+        except FileNotFoundError:
+            pass
+
+
+def _cleanup_files(paths: Iterable[Path]) -> None:
+    for path in paths:
+        try:
+            path.unlink()
+            log.info("[SESSION] Deleted %s", path)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            log.error("[SESSION] Failed to delete %s: %r", path, e)
+
+
+async def _cleanup_session_files(session_id: str, paths: list[Path]) -> None:
+    # A follow-up clip may still be synthesizing; deleting first would let it
+    # land afterwards and be orphaned in AUDIO_DIR.
+    await drain_scheduled(session_id, [p.name for p in paths])
+    await asyncio.to_thread(_cleanup_files, paths)
+
+
+async def _write_atomic(path: Path, data: bytes) -> None:
+    # Write-then-rename so readers never see a torn file. No fsync: surviving
+    # power loss is not worth the per-write latency for this data.
+    # The temp name is unique so concurrent writers never share one file.
+    tmp = path.with_name(f"{path.name}.{uuid4().hex}.tmp")
+    try:
+        async with aiofiles.open(tmp, "wb") as f:
+            await f.write(data)
+        await aiofiles.os.replace(tmp, path)
+    except BaseException:
+        try:
+            await aiofiles.os.remove(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+async def _save_session(session_id: str, sess: Session) -> None:
     try:
-        with _work_path(session_id).open("w", encoding="utf-8") as f:
-            json.dump(sess, f, indent=2)
+        await _write_atomic(_work_path(session_id), _encode_session(sess))
     except Exception as e:
-        print(f"[SESSION] Failed to persist session {session_id}: {e!r}")
+        log.error("[SESSION] Failed to persist session %s: %r", session_id, e)
+
+
+async def _flush_dirty() -> None:
+    async with _FLUSH_LOCK:
+        while _DIRTY:
+            session_id = _DIRTY.pop()
+            sess = SESSIONS.get(session_id)
+            if sess is not None:
+                await _save_session(session_id, sess)
 
 
 
 
 @app.post("/session/start")
-def start_session(consent: ConsentRequest):
+async def start_session(consent: ConsentRequest):
     if not consent.accepted:
         raise HTTPException(status_code=400, detail="Consent not accepted")
 
     session_id = str(uuid4())
     questions = pick_three_questions()
 
-    SESSIONS[session_id] = {
-        "consent": True,
-        "config": None,
-        "baseline": None,
-        "questions": [
-            {"id": i, "text": q} for i, q in enumerate(questions, start=1)
+    sess = Session(
+        questions=[
+            Question(id=i, text=q) for i, q in enumerate(questions, start=1)
         ],
-        "answers": [],
-        "current_q_index": 0,
-        "audio_files": [],
-    }
-    _save_session(session_id, SESSIONS[session_id])
+    )
+    await _put_session(session_id, sess)
     return {"session_id": session_id}
 
 
 
 @app.post("/session/{session_id}/config")
-def set_config(session_id: str, config: SessionConfig):
-    sess = _get_session(session_id)
+async def set_config(session_id: str, config: SessionConfig):
+    sess = await _get_session(session_id)
     if not sess:
         raise HTTPException(status_code=404, detail="Session not found")
 
-    sess["config"] = config.dict()
-    _save_session(session_id, sess)
+    sess.config = config.model_dump()
+    await _put_session(session_id, sess)
     return {"ok": True}
 
 
 
 @app.post("/session/{session_id}/baseline")
-def upload_baseline(session_id: str, baseline: BaselineUpload):
+async def upload_baseline(session_id: str, baseline: BaselineUpload):
 
-    sess = _get_session(session_id)
+    sess = await _get_session(session_id)
     if not sess:
         raise HTTPException(status_code=404, detail="Session not found")
 
-    sess["baseline"] = baseline.voice_features.dict()
-    _save_session(session_id, sess)
+    sess.baseline = baseline.voice_features
+    await _put_session(session_id, sess)
     return {"ok": True}
 
 
 @app.get("/session/{session_id}/next_question", response_model=Question)
-def get_next_question(session_id: str):
-    sess = _get_session(session_id)
+async def get_next_question(session_id: str):
+    sess = await _get_session(session_id)
     if not sess:
         raise HTTPException(status_code=404, detail="Session not found")
 
-    idx = sess["current_q_index"]
-    if idx >= len(sess["questions"]):
+    idx = sess.current_q_index
+    if idx >= len(sess.questions):
         raise HTTPException(status_code=400, detail="No more questions")
 
-    q = sess["questions"][idx]
+    q = sess.questions[idx]
 
-    config = sess.get("config")
-    style = (config or {}).get("interviewer_style", "neutral")
-    try:
-        audio_url = synthesize_tts(
-            text=q["text"],
-            session_id=session_id,
-            q_index=idx + 1,
-            kind="question",
-        )
-    except Exception as e:
-        print("[TTS] synthesize_tts error in next_question:", repr(e))
-        audio_url = ""
+    # Playback streams from question_audio, so the client gets the text
+    # without waiting on TTS and the first audio bytes as soon as they exist.
+    return Question(
+        id=q.id,
+        text=q.text,
+        audio_url=f"/session/{session_id}/questions/{q.id}/audio",
+    )
 
-    if audio_url:
-        sess["audio_files"].append(audio_url)
 
+async def _prepend(first: bytes, rest: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    yield first
+    async for chunk in rest:
+        yield chunk
 
 
-    return Question(
-        id=q["id"],
-        text=q["text"],
-        audio_url=audio_url,
-    )
+@app.get("/session/{session_id}/questions/{question_id}/audio")
+async def question_audio(session_id: str, question_id: int, request: Request):
+    sess = await _get_session(session_id)
+    if not sess:
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    q = next((q for q in sess.questions if q.id == question_id), None)
+    if q is None:
+        raise HTTPException(status_code=404, detail="Question not found")
+
+    cached = cached_clip_path(q.text)
+    if cached is not None:
+        return FileResponse(cached, media_type=AUDIO_MEDIA_TYPE)
+
+    # A stream has no length and can't serve byte ranges, which Safari/iOS
+    # insist on for <audio>; those requests wait for the whole clip instead.
+    if "range" in request.headers:
+        if not await warm_tts(q.text):
+            raise HTTPException(status_code=502, detail="Speech synthesis failed")
+        return FileResponse(cached_clip_path(q.text), media_type=AUDIO_MEDIA_TYPE)
+
+    stream = synthesize_tts_stream(q.text)
+    try:
+        first = await anext(stream)
+    except Exception as e:
+        log.error("[TTS] synthesize_tts_stream error in question_audio: %r", e)
+        raise HTTPException(status_code=502, detail="Speech synthesis failed")
+    return StreamingResponse(_prepend(first, stream), media_type=AUDIO_MEDIA_TYPE)
+
 
+@app.get("/audio/{path:path}")
+async def audio_file(path: str):
+    # Follow-up clips are synthesized after their URL is handed out, so a
+    # request may arrive early; wait_for_clip holds it until the file lands.
+    clip = await wait_for_clip(path)
+    if clip is None:
+        raise HTTPException(status_code=404, detail="Audio not found")
+    return FileResponse(clip, media_type=AUDIO_MEDIA_TYPE)
 
 
 @app.post("/session/{session_id}/answer", response_model=FollowupResponse)
-def submit_answer(session_id: str, payload: AnswerUpload):
-    sess = _get_session(session_id)
+async def submit_answer(session_id: str, payload: AnswerUpload):
+    sess = await _get_session(session_id)
     if not sess:
         raise HTTPException(status_code=404, detail="Session not found")
 
-    if sess["config"] is None:
+    if sess.config is None:
         raise HTTPException(status_code=400, detail="Config not set")
 
-    idx = sess["current_q_index"]
-    if idx >= len(sess["questions"]):
+    idx = sess.current_q_index
+    if idx >= len(sess.questions):
         raise HTTPException(status_code=400, detail="No more questions")
 
-    q = sess["questions"][idx]
+    q = sess.questions[idx]
 
 
     answer_record = {
       "question_id": payload.question_id,
-      "question_text": q["text"],
+      "question_text": q.text,
       "transcript": payload.transcript,
-      "voice_features": payload.voice_features.dict(),
+      "voice_features": payload.voice_features.model_dump(),
     }
-    sess["answers"].append(answer_record)
-    sess["current_q_index"] += 1
-    _save_session(session_id, sess)
+    sess.answers.append(answer_record)
+    sess.current_q_index += 1
+
+    # The user reads the follow-up before asking for the next question, which
+    # is plenty of time to have its audio ready in the clip cache.
+    if sess.current_q_index < len(sess.questions):
+        next_q = sess.questions[sess.current_q_index]
+        prefetch_tts(
+            next_q.text,
+            session_id=session_id,
+            q_index=sess.current_q_index + 1,
+        )
 
-    style = sess["config"]["interviewer_style"]
-    followup_text = generate_followup(style, q["text"], payload.transcript)
+    style = sess.config["interviewer_style"]
+    parts: list[tuple[str, asyncio.Task]] = []
 
-    try:
-        audio_url = synthesize_tts(
-            text=followup_text,
+    def _speak(sentence: str) -> None:
+        # Start TTS per sentence while the rest of the reply is still streaming.
+        parts.append((sentence, asyncio.create_task(synthesize_tts(
+            text=sentence,
             session_id=session_id,
             q_index=idx + 1,
-            kind="followup",
-        )
-    except Exception as e:
-        print("[TTS] synthesize_tts error in answer:", repr(e))
-        audio_url = ""
+            kind=f"followup{len(parts) + 1}",
+        ))))
+
+    followup_text = await generate_followup(
+        style,
+        q.text,
+        payload.transcript,
+        on_sentence=_speak if CAN_CONCAT_AUDIO else None,
+    )
 
+    # The text goes back now; /audio holds the clip request until it's ready.
+    audio_url = await schedule_tts(
+        text=followup_text,
+        session_id=session_id,
+        q_index=idx + 1,
+        kind="followup",
+        cache=followup_text in FALLBACK_FOLLOWUPS,
+        parts=parts,
+    )
     if audio_url:
-        sess["audio_files"].append(audio_url)
+        sess.audio_files.append(audio_url)
+    await _put_session(session_id, sess)
 
 
     return FollowupResponse(
@@ -207,34 +467,37 @@ def submit_answer(session_id: str, payload: AnswerUpload):
 
 
 @app.post("/session/{session_id}/finish", response_model=SessionSummary)
-def finish_session(session_id: str):
-    sess = _get_session(session_id)
+async def finish_session(session_id: str, background_tasks: BackgroundTasks):
+    sess = await _get_session(session_id)
     if not sess:
 
         raise HTTPException(status_code=404, detail="Session not found")
 
-    config = sess["config"]
+    config = sess.config
     if config is None:
         raise HTTPException(status_code=400, detail="Config not set")
 
+    cancel_prefetch(session_id)
+
     summary = SessionSummary(
         session_id=session_id,
         interviewer_style=config["interviewer_style"],
         feedback_mode=config["feedback_mode"],
-        baseline=sess["baseline"],
-        questions=[Question(**q) for q in sess["questions"]],
-        answers=sess["answers"],
-        survey=sess.get("survey"),
+        baseline=sess.baseline,
+        questions=sess.questions,
+        answers=sess.answers,
+        survey=sess.survey,
     )
 
     out_path = DATA_DIR / f"{session_id}.json"
-    with out_path.open("w", encoding="utf-8") as f:
-        json.dump(summary.dict(), f, indent=2)
-    print(f"[SESSION] Saved summary to {out_path}")
+    await _write_atomic(
+        out_path, orjson.dumps(summary.model_dump(), option=orjson.OPT_INDENT_2)
+    )
+    log.info("[SESSION] Saved summary to %s", out_path)
 
 
-    audio_files = sess.get("audio_files") or []
-    for url in audio_files:
+    stale_paths = []
+    for url in sess.audio_files:
         if not url:
             continue
 
@@ -243,28 +506,15 @@ def finish_session(session_id: str):
         else:
             fname = url.rsplit("/", 1)[-1]
 
-        fpath = AUDIO_DIR / fname
-        try:
-            fpath.unlink()
-            print(f"[TTS] Deleted audio file: {fpath}")
-        except FileNotFoundError:
+        stale_paths.append(AUDIO_DIR / fname)
 
-            pass
-        except Exception as e:
-            print(f"[TTS] Failed to delete {fpath}: {e!r}")
-
-    del SESSIONS[session_id]
-    try:
-        _work_path(session_id).unlink()
-    except FileNotFoundError:
-        pass
-    except Exception as e:
-        print(f"[SESSION] Failed to delete work file for {session_id}: {e!r}")
+    await _drop_session(session_id)
+    background_tasks.add_task(_cleanup_session_files, session_id, stale_paths)
 
     return summary
 
 @app.post("/session/{session_id}/survey")
-def submit_survey(session_id: str, survey: SurveyResponse):
+async def submit_survey(session_id: str, survey: SurveyResponse):
 
 
 
@@ -273,28 +523,22 @@ def submit_survey(session_id: str, survey: SurveyResponse):
 
         raise HTTPException(status_code=404, detail="Session summary not found")
 
+    # Stored as a sidecar so submitting never rewrites the whole summary;
+    # downloads fold it back in.
+    survey_data = survey.model_dump()
+    survey_path = _survey_path(session_id)
     try:
-        with summary_path.open("r", encoding="utf-8") as f:
-            data = json.load(f)
-    except Exception as e:
-        print(f"[SURVEY] Failed to read summary file {summary_path}: {e!r}")
-        raise HTTPException(status_code=500, detail="Failed to read summary file")
-
-
-    data["survey"] = survey.dict()
-
-    try:
-        with summary_path.open("w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2)
-        print(f"[SURVEY] Updated summary file with survey: {summary_path}")
+        await _write_atomic(survey_path, orjson.dumps(survey_data))
+        log.info("[SURVEY] Saved survey: %s", survey_path)
     except Exception as e:
-        print(f"[SURVEY] Failed to update summary file {summary_path}: {e!r}")
-        raise HTTPException(status_code=500, detail="Failed to update summary file")
+        log.error("[SURVEY] Failed to save survey file %s: %r", survey_path, e)
+        raise HTTPException(status_code=500, detail="Failed to save survey file")
 
-    sess = SESSIONS.get(session_id)
+    sess = await _get_session(session_id)
     if sess is not None:
-        sess["survey"] = survey.dict()
-        print(f"[SURVEY] Also updated in-memory session {session_id}")
+        sess.survey = survey_data
+        await _put_session(session_id, sess)
+        log.info("[SURVEY] Also updated in-flight session %s", session_id)
 
     return {"ok": True}
 
@@ -302,9 +546,7 @@ def submit_survey(session_id: str, survey: SurveyResponse):
 
 @app.get("/sessions")
 def list_sessions():
-    files = sorted(
-        p for p in DATA_DIR.glob("*.json") if not p.name.endswith(WORK_SUFFIX)
-    )
+    files = _summary_paths()
     return {"count": len(files), "sessions": [p.stem for p in files]}
 
 
@@ -313,27 +555,60 @@ def download_session(session_id: str):
     path = DATA_DIR / f"{session_id}.json"
     if not path.exists():
         raise HTTPException(status_code=404, detail="Session summary not found")
-    return FileResponse(path, media_type="application/json", filename=path.name)
+    merged = _merged_summary(path)
+    if merged is None:
+        return FileResponse(path, media_type="application/json", filename=path.name)
+    return Response(
+        merged,
+        media_type="application/json",
+        headers={"Content-Disposition": f'attachment; filename="{path.name}"'},
+    )
+
+
+class _ZipSink(io.RawIOBase):
+    """Write-only buffer that lets a ZipFile be drained between members."""
+
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self._chunks.append(bytes(b))
+        return len(b)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _iter_zip(files: Iterable[Path]) -> Iterator[bytes]:
+    sink = _ZipSink()
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for p in files:
+            merged = _merged_summary(p)
+            if merged is None:
+                zf.write(p, arcname=p.name)
+            else:
+                zf.writestr(p.name, merged)
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    yield sink.drain()
 
 
 @app.get("/sessions/archive")
 def download_archive():
-    files = [p for p in DATA_DIR.glob("*.json") if not p.name.endswith(WORK_SUFFIX)]
+    files = _summary_paths()
     if not files:
         raise HTTPException(status_code=404, detail="No session files")
 
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".zip") as tmp:
-        zip_path = Path(tmp.name)
-
-    with zipfile.ZipFile(zip_path, mode="w", compression=zipfile.ZIP_DEFLATED) as zf:
-        for p in files:
-            zf.write(p, arcname=p.name)
-
-    return FileResponse(
-        zip_path,
+    return StreamingResponse(
+        _iter_zip(files),
         media_type="application/zip",
-        filename="sessions.zip",
-        background=BackgroundTask(zip_path.unlink, missing_ok=True),
+        headers={"Content-Disposition": 'attachment; filename="sessions.zip"'},
     )
 
 
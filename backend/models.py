@@ -1,7 +1,8 @@
 # backend/models.py
-from typing import Dict, List, Literal, Optional
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Literal, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 InterviewerStyle = Literal["neutral", "challenging"]
 FeedbackMode = Literal["real", "fake", "none"]
@@ -12,11 +13,15 @@ class ConsentRequest(BaseModel):
 
 
 class SessionConfig(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     interviewer_style: InterviewerStyle
     feedback_mode: FeedbackMode
 
 
 class VoiceFeatures(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     nervousness_score: float
     avg_rms: float
     silence_ratio: float
@@ -69,3 +74,16 @@ class SessionSummary(BaseModel):
     answers: List[Dict]
     survey: Optional[SurveyResponse] = None
 
+
+@dataclass(slots=True)
+class Session:
+    """In-flight interview state, persisted to the session work file."""
+
+    questions: List[Question]
+    consent: bool = True
+    config: Optional[Dict[str, Any]] = None
+    baseline: Optional[VoiceFeatures] = None
+    answers: List[Dict[str, Any]] = field(default_factory=list)
+    current_q_index: int = 0
+    audio_files: List[str] = field(default_factory=list)
+    survey: Optional[Dict[str, Any]] = None
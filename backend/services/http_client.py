@@ -0,0 +1,16 @@
+# backend/services/http_client.py
+import httpx
+from openai import DefaultAsyncHttpxClient
+
+# One keep-alive pool shared by every AsyncOpenAI client so concurrent
+# sessions reuse warm TLS connections instead of re-handshaking per call.
+http_client = DefaultAsyncHttpxClient(
+    http2=True,
+    limits=httpx.Limits(
+        max_keepalive_connections=100,
+        max_connections=200,
+        keepalive_expiry=60,
+    ),
+    # Fail fast on a dead route, but leave room for a long TTS clip.
+    timeout=httpx.Timeout(60.0, connect=5.0),
+)
@@ -0,0 +1,126 @@
+# backend/services/llm_cache.py
+
+import hashlib
+import logging
+import os
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+from openai import AsyncOpenAI
+
+OPENAI_EMBEDDING_MODEL = os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small")
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "512"))
+LLM_CACHE_SIMILARITY = float(os.getenv("LLM_CACHE_SIMILARITY", "0.92"))
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class CacheKey:
+    exact: Optional[str]
+    scope: int
+    embedding: Optional[np.ndarray]
+
+
+class SemanticCache:
+    """Follow-up cache keyed by (style, question, transcript embedding).
+
+    Embeddings live in one preallocated float32 matrix so a lookup is a single
+    `X @ q` over all rows; rows from other (style, question) scopes are masked
+    out and the least recently used row is overwritten when full.
+    """
+
+    def __init__(
+        self,
+        client: AsyncOpenAI,
+        model: str,
+        capacity: int = LLM_CACHE_SIZE,
+        threshold: float = LLM_CACHE_SIMILARITY,
+    ) -> None:
+        self._client = client
+        self._model = model
+        self._capacity = capacity
+        self._threshold = threshold
+        self._exact: OrderedDict[str, str] = OrderedDict()
+        self._matrix: np.ndarray | None = None
+        self._scopes = np.zeros(capacity, dtype=np.int64)
+        self._last_used = np.full(capacity, -1, dtype=np.int64)
+        self._responses: list[str | None] = [None] * capacity
+        self._clock = 0
+
+    async def key(
+        self, style: str, question: str, transcript: str, temperature: float
+    ) -> CacheKey:
+        exact = None
+        if temperature == 0:
+            exact = hashlib.sha256(
+                f"{self._model}|{style}|{question}|{transcript}".encode("utf-8")
+            ).hexdigest()
+            if exact in self._exact:
+                return CacheKey(exact=exact, scope=0, embedding=None)
+
+        scope = int.from_bytes(
+            hashlib.sha256(f"{style}|{question}".encode("utf-8")).digest()[:8],
+            "little",
+            signed=True,
+        )
+        return CacheKey(exact=exact, scope=scope, embedding=await self._embed(transcript))
+
+    def get(self, key: CacheKey) -> str | None:
+        if key.exact is not None and key.exact in self._exact:
+            self._exact.move_to_end(key.exact)
+            return self._exact[key.exact]
+
+        if key.embedding is None or self._matrix is None:
+            return None
+
+        sims = self._matrix @ key.embedding
+        sims[(self._last_used < 0) | (self._scopes != key.scope)] = -np.inf
+        row = int(np.argmax(sims))
+        if sims[row] < self._threshold:
+            return None
+
+        self._touch(row)
+        return self._responses[row]
+
+    def put(self, key: CacheKey, response: str) -> None:
+        if key.exact is not None:
+            self._exact[key.exact] = response
+            self._exact.move_to_end(key.exact)
+            if len(self._exact) > self._capacity:
+                self._exact.popitem(last=False)
+
+        if key.embedding is None:
+            return
+        if self._matrix is None:
+            self._matrix = np.zeros(
+                (self._capacity, key.embedding.shape[0]), dtype=np.float32
+            )
+
+        row = int(np.argmin(self._last_used))
+        self._matrix[row] = key.embedding
+        self._scopes[row] = key.scope
+        self._responses[row] = response
+        self._touch(row)
+
+    def _touch(self, row: int) -> None:
+        self._clock += 1
+        self._last_used[row] = self._clock
+
+    async def _embed(self, text: str) -> np.ndarray | None:
+        try:
+            resp = await self._client.embeddings.create(
+                model=OPENAI_EMBEDDING_MODEL,
+                input=text,
+            )
+        except Exception as e:
+            log.error("[OpenAI] Error embedding transcript for cache: %r", e)
+            return None
+
+        vec = np.asarray(resp.data[0].embedding, dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        if not norm:
+            return None
+        return vec / norm
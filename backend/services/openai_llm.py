@@ -1,21 +1,33 @@
 # backend/services/openai_llm.py
 
+import asyncio
+import logging
 import os
 import random
-from typing import List
+import re
+from typing import Callable, List, Optional
 
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import AsyncOpenAI
+
+from services.http_client import http_client
+from services.llm_cache import SemanticCache
 
 load_dotenv()
 
+log = logging.getLogger(__name__)
+
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 if not OPENAI_API_KEY:
     raise RuntimeError("OPENAI_API_KEY not set")
 
 OPENAI_CHAT_MODEL = os.getenv("OPENAI_CHAT_MODEL", "gpt-4o-mini")
+OPENAI_CHAT_TEMPERATURE = float(os.getenv("OPENAI_CHAT_TEMPERATURE", "0.7"))
+OPENAI_CONCURRENT_REQUESTS = int(os.getenv("OPENAI_CONCURRENT_REQUESTS", "50"))
 
-client = OpenAI(api_key=OPENAI_API_KEY)
+client = AsyncOpenAI(api_key=OPENAI_API_KEY, http_client=http_client)
+followup_cache = SemanticCache(client, OPENAI_CHAT_MODEL)
+_LLM_SEM = asyncio.Semaphore(OPENAI_CONCURRENT_REQUESTS)
 
 # ===================== System Prompts =====================
 
@@ -76,6 +88,19 @@ Your response must:
 - Contain no bullet points, no lists, and no new questions.
 """.strip()
 
+NEUTRAL_FALLBACK_FOLLOWUP = (
+    "Thanks for your answer. Overall it's a good start — next time, "
+    "try to make the situation and your specific actions a bit clearer, "
+    "and highlight the result more explicitly."
+)
+
+CHALLENGING_FALLBACK_FOLLOWUP = (
+    "Thanks for your answer. Right now the situation and your impact are still a bit vague — "
+    "next time, be more concrete about what you did and what changed because of you."
+)
+
+FALLBACK_FOLLOWUPS = frozenset({NEUTRAL_FALLBACK_FOLLOWUP, CHALLENGING_FALLBACK_FOLLOWUP})
+
 # ===================== Question Pool =====================
 
 GENERAL_QUESTIONS: List[str] = [
@@ -97,57 +122,130 @@ GENERAL_QUESTIONS: List[str] = [
 ]
 
 
+_QUESTION_POOL = tuple(GENERAL_QUESTIONS)
+_RNG = random.Random()
+
+
 def pick_three_questions() -> List[str]:
-    if len(GENERAL_QUESTIONS) <= 3:
-        return GENERAL_QUESTIONS
-    return random.sample(GENERAL_QUESTIONS, k=3)
+    if len(_QUESTION_POOL) <= 3:
+        return list(_QUESTION_POOL)
+    return _RNG.sample(_QUESTION_POOL, k=3)
 
 
 # ===================== Follow-up Generation =====================
 
-def generate_followup(style: str, question: str, transcript: str | None) -> str:
-"
-    if style == "neutral":
-        system_prompt = NEUTRAL_SYSTEM_PROMPT
-    else:
-        system_prompt = CHALLENGING_SYSTEM_PROMPT
-
+_SYSTEM_MESSAGES = {
+    "neutral": {"role": "system", "content": NEUTRAL_SYSTEM_PROMPT},
+    "challenging": {"role": "system", "content": CHALLENGING_SYSTEM_PROMPT},
+}
+
+_USER_PROMPT = (
+    "You just asked the interview question: \"{question}\"\n"
+    "The candidate answered (ASR transcript or summary):\n"
+    "{answer}\n\n"
+    "Give your reaction as the interviewer.\n"
+    "Remember:\n"
+    "- You expect STAR structure (Situation, Task, Action, Result).\n"
+    "- You only provide feedback, you do NOT ask new questions.\n"
+    "- If the answer is clearly off-topic, nonsense, or unrelated to the question, "
+    "explicitly mention this and recommend that they refocus on the question.\n"
+    "- Respond in 2–3 natural spoken-style sentences."
+).format
+
+
+# Terminal punctuation followed by whitespace and a capitalised word, so that
+# abbreviations like "e.g. the" do not split a sentence.
+_SENTENCE_END = re.compile(r"[.!?…]+[\"')\]]*\s+(?=[A-Z\"'(“])")
+
+
+async def generate_followup(
+    style: str,
+    question: str,
+    transcript: str | None,
+    on_sentence: Optional[Callable[[str], None]] = None,
+) -> str:
+    """Interviewer feedback for one answer.
+
+    The completion is streamed; if `on_sentence` is given it is called with
+    each sentence as soon as it is complete, so callers can start TTS early.
+    Emitted sentences always join back into the returned text; cached and
+    fallback replies are returned without any callbacks.
+    """
     user_text = transcript or "(no transcript; only voice features are available)"
+    user_prompt = _USER_PROMPT(question=question, answer=user_text)
 
-    user_prompt = (
-        f"You just asked the interview question: \"{question}\"\n"
-        f"The candidate answered (ASR transcript or summary):\n"
-        f"{user_text}\n\n"
-        "Give your reaction as the interviewer.\n"
-        "Remember:\n"
-        "- You expect STAR structure (Situation, Task, Action, Result).\n"
-        "- You only provide feedback, you do NOT ask new questions.\n"
-        "- If the answer is clearly off-topic, nonsense, or unrelated to the question, "
-        "explicitly mention this and recommend that they refocus on the question.\n"
-        "- Respond in 2–3 natural spoken-style sentences."
-    )
+    # The cache lookup may need an embeddings round trip, so the completion
+    # starts alongside it; sentences are held back until the lookup misses
+    # and the completion is dropped if it hits.
+    held: list[str] = []
+    released = False
 
+    def _emit(sentence: str) -> None:
+        if released:
+            on_sentence(sentence)
+        else:
+            held.append(sentence)
+
+    completion = asyncio.create_task(
+        _stream_followup(style, user_prompt, _emit if on_sentence else None)
+    )
     try:
-        resp = client.chat.completions.create(
+        cache_key = await followup_cache.key(
+            style, question, user_text, OPENAI_CHAT_TEMPERATURE
+        )
+        cached = followup_cache.get(cache_key)
+        if cached is not None:
+            completion.cancel()
+            return cached
+
+        released = True
+        for sentence in held:
+            on_sentence(sentence)
+
+        content = await completion
+        followup_cache.put(cache_key, content)
+        return content
+    except Exception as e:
+        log.error("[OpenAI] Error generating followup: %r", e)
+        if style == "neutral":
+            return NEUTRAL_FALLBACK_FOLLOWUP
+        else:
+            return CHALLENGING_FALLBACK_FOLLOWUP
+    finally:
+        if not completion.done():
+            completion.cancel()
+
+
+async def _stream_followup(
+    style: str, user_prompt: str, on_sentence: Optional[Callable[[str], None]]
+) -> str:
+    pieces: list[str] = []
+    pending = ""
+    async with _LLM_SEM:
+        stream = await client.chat.completions.create(
             model=OPENAI_CHAT_MODEL,
             messages=[
-                {"role": "system", "content": system_prompt},
+                _SYSTEM_MESSAGES.get(style, _SYSTEM_MESSAGES["challenging"]),
                 {"role": "user",  "content": user_prompt},
             ],
-            temperature=0.7,
+            temperature=OPENAI_CHAT_TEMPERATURE,
+            stream=True,
         )
-        content = resp.choices[0].message.content
-        return content.strip()
-    except Exception as e:
-        print("[OpenAI] Error generating followup:", repr(e))
-        if style == "neutral":
-            return (
-                "Thanks for your answer. Overall it's a good start — next time, "
-                "try to make the situation and your specific actions a bit clearer, "
-                "and highlight the result more explicitly."
-            )
-        else:
-            return (
-                "Thanks for your answer. Right now the situation and your impact are still a bit vague — "
-                "next time, be more concrete about what you did and what changed because of you."
-            )
+        async for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if not delta:
+                continue
+            pieces.append(delta)
+            if on_sentence is None:
+                continue
+            pending += delta
+            while (m := _SENTENCE_END.search(pending)):
+                on_sentence(pending[:m.end()])
+                pending = pending[m.end():]
+
+    content = "".join(pieces).strip()
+    if not content:
+        raise ValueError("empty completion")
+    if on_sentence is not None and pending.strip():
+        on_sentence(pending)
+    return content
@@ -1,67 +1,676 @@
 # backend/services/tts_openai.py
+import asyncio
+import fcntl
+import hashlib
+import logging
 import os
+import shutil
+import time
+import weakref
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
+from typing import AsyncIterator, BinaryIO, List, Sequence, Tuple
+from uuid import uuid4
+
+import aiofiles
 
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import AsyncOpenAI
+
+from services.http_client import http_client
 
 load_dotenv()
 
+log = logging.getLogger(__name__)
+
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 if not OPENAI_API_KEY:
     raise RuntimeError("OPENAI_API_KEY not set")
 
 OPENAI_TTS_MODEL = os.getenv("OPENAI_TTS_MODEL", "gpt-4o-mini-tts") 
 OPENAI_TTS_VOICE = os.getenv("OPENAI_TTS_VOICE", "alloy")
+OPENAI_TTS_FORMAT = os.getenv("OPENAI_TTS_FORMAT", "mp3")
+TTS_CONCURRENT_REQUESTS = int(os.getenv("TTS_CONCURRENT_REQUESTS", "3"))
+TTS_WAIT_TIMEOUT_SEC = float(os.getenv("TTS_WAIT_TIMEOUT_SEC", "30"))
+
+# response_format -> (file extension, Content-Type). Opus is about half the
+# size of mp3 for speech, but mp3 stays the default: the frontend plays clips
+# with a bare `new Audio(url)` and older Safari/iOS can't decode Ogg Opus.
+_FORMATS = {
+    "opus": ("ogg", "audio/ogg"),
+    "mp3": ("mp3", "audio/mpeg"),
+    "aac": ("aac", "audio/aac"),
+    "flac": ("flac", "audio/flac"),
+    "wav": ("wav", "audio/wav"),
+}
+if OPENAI_TTS_FORMAT not in _FORMATS:
+    raise RuntimeError(f"Unsupported OPENAI_TTS_FORMAT: {OPENAI_TTS_FORMAT}")
+AUDIO_EXT, AUDIO_MEDIA_TYPE = _FORMATS[OPENAI_TTS_FORMAT]
+
+# MP3 and ADTS AAC are plain frame sequences, so sentence clips can be joined
+# byte-wise; container formats need one synthesis of the whole text.
+CAN_CONCAT_AUDIO = OPENAI_TTS_FORMAT in ("mp3", "aac")
+
+
+@dataclass(slots=True, frozen=True)
+class _Cfg:
+    model: str
+    voice: str
+    fmt: str
+    ext: str
+
+
+# Bound as a default argument on the per-clip functions, so reading a knob is
+# a local lookup plus a slot read rather than several module-global lookups.
+_CFG = _Cfg(
+    model=OPENAI_TTS_MODEL,
+    voice=OPENAI_TTS_VOICE,
+    fmt=OPENAI_TTS_FORMAT,
+    ext=AUDIO_EXT,
+)
 
-client = OpenAI(api_key=OPENAI_API_KEY)
+client = AsyncOpenAI(api_key=OPENAI_API_KEY, http_client=http_client)
+_TTS_SEM = asyncio.Semaphore(TTS_CONCURRENT_REQUESTS)
 
-AUDIO_DIR = Path("data/audio")
+# Blocking clip file work (links, joins) queues here, off the event loop and
+# without competing with the rest of the app for the default executor.
+_TTS_POOL = ThreadPoolExecutor(
+    max_workers=TTS_CONCURRENT_REQUESTS, thread_name_prefix="tts"
+)
+
+# Resolved once: older SDKs only offer the buffered create().
+_HAS_STREAMING = hasattr(client.audio.speech, "with_streaming_response")
+_speech_create = (
+    client.audio.speech.with_streaming_response.create
+    if _HAS_STREAMING
+    else client.audio.speech.create
+)
+
+# Clips are short-lived, so a RAM-backed dir (e.g. /dev/shm/affect-audio) works
+# well; anything lost on reboot is simply re-synthesized on demand.
+AUDIO_DIR = Path(os.getenv("AFFECT_AUDIO_DIR", "data/audio"))
 AUDIO_DIR.mkdir(parents=True, exist_ok=True)
 
+CACHE_DIR = AUDIO_DIR / "cache"
+CACHE_DIR.mkdir(exist_ok=True)
+
+# Clip paths are built as plain strings: the per-clip code only hands them to
+# os.* and open(), so there is no point paying for Path objects each time.
+_AUDIO_DIR_STR = os.fspath(AUDIO_DIR)
+_CACHE_DIR_STR = os.fspath(CACHE_DIR)
+
+# Content hash -> cache file known to exist, so hot texts skip even the stat.
+_LRU: OrderedDict[str, str] = OrderedDict()
+_LRU_SIZE = 256
+
+# Content hash -> pending synthesis, so concurrent requests for the same text
+# (e.g. a question being pre-warmed) wait for one API call instead of racing.
+_inflight: dict[str, asyncio.Future] = {}
+
+
+def _cache_key(text: str, *, _cfg: _Cfg = _CFG) -> str:
+    return hashlib.blake2b(
+        f"{_cfg.model}|{_cfg.voice}|{_cfg.fmt}|{text}".encode("utf-8"),
+        digest_size=16,
+    ).hexdigest()
+
+
+_READ_CHUNK = 1 << 18
+
+
+async def _speak_to(text: str, out_path: str, *, _cfg: _Cfg = _CFG) -> None:
+    # The clip is gathered in memory (the API caps input at 4096 characters,
+    # so a few MB at most) and written in one go on the TTS pool once the API
+    # slot is released; nothing touches the disk while the request queues.
+    async with _TTS_SEM:
+        request = _speech_create(
+            model=_cfg.model,
+            voice=_cfg.voice,
+            input=text,
+            response_format=_cfg.fmt,
+        )
+        if _HAS_STREAMING:
+            buf = bytearray()
+            async with request as response:
+                async for chunk in response.iter_bytes(chunk_size=_READ_CHUNK):
+                    buf += chunk
+        else:
+            buf = (await request).content
+    await _in_pool(_write_clip, out_path, buf)
+
+
+def _write_clip(path: str, data: bytes) -> None:
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+async def _cached_clip(text: str, *, _cfg: _Cfg = _CFG) -> str:
+    key = _cache_key(text)
+    path = _LRU.get(key)
+    if path is not None:
+        _LRU.move_to_end(key)
+        return path
+
+    fut = _inflight.get(key)
+    if fut is None:
+        # The fill runs in its own task so a caller that is cancelled (e.g. an
+        # abandoned prefetch) only stops waiting; other waiters still get it.
+        fut = _inflight[key] = asyncio.get_running_loop().create_future()
+        task = asyncio.create_task(_fill_cache(text, key, fut))
+        _FILL_TASKS.add(task)
+        task.add_done_callback(_FILL_TASKS.discard)
+    return await asyncio.shield(fut)
+
+
+_FILL_TASKS: set[asyncio.Task] = set()
+
+
+async def _fill_cache(
+    text: str, key: str, fut: asyncio.Future, *, _cfg: _Cfg = _CFG
+) -> None:
+    try:
+        path = f"{_CACHE_DIR_STR}/{key}.{_cfg.ext}"
+        if not os.path.exists(path):
+            tmp = _part_path(path)
+            try:
+                await _speak_to(text, tmp)
+                os.replace(tmp, path)
+            finally:
+                _discard(tmp)
+        _remember(key, path)
+        fut.set_result(path)
+    except BaseException as e:
+        _fail(fut, e)
+        if isinstance(e, asyncio.CancelledError):
+            raise
+    finally:
+        del _inflight[key]
+
+
+def _fail(fut: asyncio.Future, exc: BaseException) -> None:
+    # The future is shared, so it is never cancelled: waiters get an ordinary
+    # exception they can handle even when the synthesis itself was cancelled.
+    if isinstance(exc, asyncio.CancelledError):
+        exc = RuntimeError("TTS synthesis was cancelled")
+    fut.set_exception(exc)
+    fut.exception()  # waiters re-raise it; don't warn when there are none
+
+
+def _remember(key: str, path: str) -> None:
+    _LRU[key] = path
+    if len(_LRU) > _LRU_SIZE:
+        _LRU.popitem(last=False)
+
 
-def synthesize_tts(text: str, session_id: str, q_index: int, kind: str) -> str:
+def cached_clip_path(text: str, *, _cfg: _Cfg = _CFG) -> str | None:
+    """Path of the cached clip for `text` if one exists, without synthesizing."""
+    key = _cache_key((text or "").strip())
+    path = _LRU.get(key)
+    if path is not None:
+        _LRU.move_to_end(key)
+        return path
+    path = f"{_CACHE_DIR_STR}/{key}.{_cfg.ext}"
+    if os.path.exists(path):
+        _remember(key, path)
+        return path
+    return None
+
+
+async def _stream_into_cache(
+    text: str, queue: asyncio.Queue, fut: asyncio.Future, *, _cfg: _Cfg = _CFG
+) -> None:
+    key = _cache_key(text)
+    path = f"{_CACHE_DIR_STR}/{key}.{_cfg.ext}"
+    tmp = _part_path(path)
+    try:
+        async with _TTS_SEM:
+            request = _speech_create(
+                model=_cfg.model,
+                voice=_cfg.voice,
+                input=text,
+                response_format=_cfg.fmt,
+            )
+            if _HAS_STREAMING:
+                # Chunks go to the listener as they arrive (a fixed chunk_size
+                # would hold back the first bytes); the file is written once.
+                content = bytearray()
+                async with request as response:
+                    async for chunk in response.iter_bytes():
+                        queue.put_nowait(chunk)
+                        content += chunk
+            else:
+                # No streaming support: the listener gets the whole clip at once.
+                content = (await request).content
+                queue.put_nowait(content)
+        await _in_pool(_write_clip, tmp, content)
+        os.replace(tmp, path)
+        _remember(key, path)
+        fut.set_result(path)
+        queue.put_nowait(None)
+    except BaseException as e:
+        _discard(tmp)
+        _fail(fut, e)
+        queue.put_nowait(fut.exception())
+        if isinstance(e, asyncio.CancelledError):
+            raise
+        log.error("[TTS] Error streaming clip: %r", e)
+    finally:
+        del _inflight[key]
+
+
+_STREAM_TASKS: set[asyncio.Task] = set()
+
+
+async def synthesize_tts_stream(text: str) -> AsyncIterator[bytes]:
+    """Yield audio for `text` as it arrives from the API.
+
+    A separate task pulls the response and tees it into the clip cache, so
+    the cache is completed even if the listener disconnects part-way. If the
+    same text is already being synthesized, the finished clip is sent instead.
+    """
+    text = (text or "").strip()
+    key = _cache_key(text)
+    fut = _inflight.get(key)
+    if fut is not None:
+        path = await asyncio.shield(fut)
+        async with aiofiles.open(path, "rb") as f:
+            while chunk := await f.read(_READ_CHUNK):
+                yield chunk
+        return
+
+    fut = _inflight[key] = asyncio.get_running_loop().create_future()
+    queue: asyncio.Queue = asyncio.Queue()
+    task = asyncio.create_task(_stream_into_cache(text, queue, fut))
+    _STREAM_TASKS.add(task)
+    task.add_done_callback(_STREAM_TASKS.discard)
+
+    while (item := await queue.get()) is not None:
+        if isinstance(item, Exception):
+            raise item
+        yield item
+
+
+def _clip_name(
+    session_id: str, q_index: int, kind: str, *, _cfg: _Cfg = _CFG
+) -> str:
+    return f"{session_id}_q{q_index}_{kind}.{_cfg.ext}"
+
+
+def _part_path(out_path: str) -> str:
+    return f"{os.path.splitext(out_path)[0]}.{uuid4().hex}.part"
+
+
+def _discard(path: str) -> None:
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+def _link(src: str, dst: str) -> None:
+    tmp = _part_path(dst)
+    try:
+        os.link(src, tmp)
+    except OSError:
+        shutil.copyfile(src, tmp)
+    os.replace(tmp, dst)
+
+
+async def warm_tts(text: str) -> bool:
+    """Make sure `text` is in the shared clip cache without a session copy."""
+    text = (text or "").strip()
+    if not text:
+        return False
+    try:
+        await _cached_clip(text)
+        return True
+    except Exception as e:
+        log.error("[TTS] Error warming cache: %r", e)
+        return False
+
+
+async def _in_pool(fn, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_TTS_POOL, partial(fn, *args, **kwargs))
+
+
+# In-process waiters for a clip queue on its asyncio.Lock, so only one of them
+# at a time tries the cross-worker flock. Entries go once nobody holds them.
+_CLIP_LOCKS: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+_FLOCK_POLL_SEC = 0.05
+
+
+def _try_flock(lock_path: str) -> BinaryIO | None:
+    """Open and flock `lock_path` without blocking, or return None.
+
+    The holder unlinks the lock file when done, so a lock may be won on a
+    file that is no longer there while a newcomer locks a fresh one; that
+    only counts if the inode is still the one at `lock_path`.
+    """
+    lock = open(lock_path, "ab")
+    try:
+        fcntl.flock(lock.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        if os.fstat(lock.fileno()).st_ino == os.stat(lock_path).st_ino:
+            return lock
+    except (BlockingIOError, FileNotFoundError):
+        pass
+    except BaseException:
+        lock.close()
+        raise
+    lock.close()
+    return None
+
+
+def _release_flock(lock: BinaryIO, lock_path: str) -> None:
+    _discard(lock_path)
+    lock.close()
+
+
+def _close_abandoned(attempt: Future) -> None:
+    if not attempt.cancelled() and attempt.exception() is None and attempt.result():
+        attempt.result().close()
+
+
+@asynccontextmanager
+async def _lock_clip(lock_path: str) -> AsyncIterator[None]:
+    """Hold the clip lock at `lock_path` for the duration of the block.
+
+    The flock is only ever tried without blocking and retried after a short
+    sleep, so a cancelled waiter never leaves a pool thread parked in flock.
+    """
+    guard = _CLIP_LOCKS.get(lock_path)
+    if guard is None:
+        guard = _CLIP_LOCKS[lock_path] = asyncio.Lock()
+    async with guard:
+        while True:
+            attempt = _TTS_POOL.submit(_try_flock, lock_path)
+            try:
+                lock = await asyncio.wrap_future(attempt)
+            except asyncio.CancelledError:
+                attempt.add_done_callback(_close_abandoned)
+                raise
+            if lock is not None:
+                break
+            await asyncio.sleep(_FLOCK_POLL_SEC)
+        try:
+            yield
+        finally:
+            await asyncio.shield(_in_pool(_release_flock, lock, lock_path))
+
+
+def _is_complete(path: str) -> bool:
+    try:
+        return os.stat(path).st_size > 0
+    except FileNotFoundError:
+        return False
+
+
+async def synthesize_tts(
+    text: str, session_id: str, q_index: int, kind: str, cache: bool = False
+) -> str:
+    """Synthesize `text` to the session's clip and return its URL.
+
+    With `cache=True` the audio comes from a shared content-addressed cache
+    and the session file is a hard link to it, so deleting it at the end of
+    the session leaves the cached clip in place.
+    """
     text = (text or "").strip()
     if not text:
         return ""
 
-    filename = f"{session_id}_q{q_index}_{kind}.mp3"
-    out_path = AUDIO_DIR / filename
+    filename = _clip_name(session_id, q_index, kind)
+    out_path = f"{_AUDIO_DIR_STR}/{filename}"
+    url = f"/audio/{filename}"
+
+    # Finished clips are only ever renamed into place, so an existing file is
+    # complete and a retried request can reuse it.
+    if _is_complete(out_path):
+        return url
 
+    lock_path = f"{out_path}.lock"
+    tmp = _part_path(out_path)
     try:
+        # Concurrent callers for the same clip queue here, then find the
+        # first caller's file instead of synthesizing it again.
+        async with _lock_clip(lock_path):
+            try:
+                if _is_complete(out_path):
+                    return url
+                if cache:
+                    await _in_pool(_link, await _cached_clip(text), out_path)
+                else:
+                    await _speak_to(text, tmp)
+                    os.replace(tmp, out_path)
+            finally:
+                _discard(tmp)
 
-        from contextlib import nullcontext
+        log.info("[TTS] OK %s q%s: %s", kind, q_index, url)
+        return url
 
-        ctx = (
-            client.audio.speech.with_streaming_response.create(
-                model=OPENAI_TTS_MODEL,
-                voice=OPENAI_TTS_VOICE,
-                input=text,
-            )
-            if hasattr(client.audio.speech, "with_streaming_response")
-            else nullcontext(
-                client.audio.speech.create(
-                    model=OPENAI_TTS_MODEL,
-                    voice=OPENAI_TTS_VOICE,
-                    input=text,
-                )
-            )
+    except Exception as e:
+        log.error(
+            "[TTS] Error for session=%s q=%s kind=%s: %r", session_id, q_index, kind, e
         )
+        return ""
 
-        with ctx as response:
-            if hasattr(response, "stream_to_file"):
-                response.stream_to_file(out_path)
-            else:
 
-                with out_path.open("wb") as f:
-                    f.write(response.read())
+# (session_id, q_index) -> speculative cache warm started ahead of need.
+_prefetch: dict[tuple[str, int], asyncio.Task] = {}
+PREFETCH_TIMEOUT_SEC = float(os.getenv("TTS_PREFETCH_TIMEOUT_SEC", "120"))
+
+
+def prefetch_tts(text: str, session_id: str, q_index: int) -> None:
+    """Start putting a clip that will probably be needed soon in the cache.
+
+    Whoever asks for the text next (the question audio route, a warm) gets a
+    cache hit or joins the synthesis in flight. cancel_prefetch or
+    PREFETCH_TIMEOUT_SEC only stop this session waiting on it; the shared
+    fill itself carries on for anyone else who needs the text.
+    """
+    text = (text or "").strip()
+    key = (session_id, q_index)
+    if not text or key in _prefetch:
+        return
+
+    task = asyncio.create_task(asyncio.wait_for(warm_tts(text), PREFETCH_TIMEOUT_SEC))
+    _prefetch[key] = task
+
+    def _done(t: asyncio.Task) -> None:
+        if _prefetch.get(key) is t:
+            del _prefetch[key]
+        if not t.cancelled() and t.exception() is not None:
+            log.error("[TTS] Prefetch timed out for q%s", q_index)
+
+    task.add_done_callback(_done)
+
+
+def cancel_prefetch(session_id: str) -> None:
+    """Stop waiting on every prefetch still running for `session_id`."""
+    for key, task in list(_prefetch.items()):
+        if key[0] == session_id:
+            task.cancel()
 
-        url = f"/audio/{filename}"
-        print(f"[TTS] OK {kind} q{q_index}: {url}")
-        return url
 
+async def concat_audio(
+    part_urls: List[str], session_id: str, q_index: int, kind: str
+) -> str:
+    """Join per-sentence clips, in order, into one session file."""
+    return await _in_pool(_concat_audio, part_urls, session_id, q_index, kind)
+
+
+def _concat_audio(part_urls: List[str], session_id: str, q_index: int, kind: str) -> str:
+    filename = _clip_name(session_id, q_index, kind)
+    out_path = f"{_AUDIO_DIR_STR}/{filename}"
+    parts = [f"{_AUDIO_DIR_STR}/{url.rsplit('/', 1)[-1]}" for url in part_urls]
+
+    tmp = _part_path(out_path)
+    with open(tmp, "wb") as out:
+        for p in parts:
+            with open(p, "rb") as f:
+                out.write(f.read())
+    os.replace(tmp, out_path)
+    for p in parts:
+        _discard(p)
+    return f"/audio/{filename}"
+
+
+# Clip filename -> set once a scheduled synthesis has finished (or failed),
+# so the audio route can hold a request that races it instead of 404ing.
+# Other workers can't see this dict, so a `<clip>.pending` marker file is kept
+# next to the clip for as long as it is scheduled and they poll for that.
+# Markers older than TTS_WAIT_TIMEOUT_SEC are ignored: the work they announce
+# is overdue anyway, and a crashed worker never removes its own.
+_pending: dict[str, asyncio.Event] = {}
+_SCHEDULED: dict[str, asyncio.Task] = {}
+_PENDING_SUFFIX = ".pending"
+_POLL_SEC = 0.1
+
+
+def _touch(path: str) -> None:
+    open(path, "wb").close()
+
+
+def _marker_live(marker: str) -> bool:
+    try:
+        return time.time() - os.stat(marker).st_mtime < TTS_WAIT_TIMEOUT_SEC
+    except FileNotFoundError:
+        return False
+
+
+def _any_live(markers: Sequence[str]) -> bool:
+    return any(map(_marker_live, markers))
+
+
+def _awaiting(path: str, marker: str) -> bool:
+    return not os.path.isfile(path) and _marker_live(marker)
+
+
+async def schedule_tts(
+    text: str,
+    session_id: str,
+    q_index: int,
+    kind: str,
+    cache: bool = False,
+    parts: Sequence[Tuple[str, asyncio.Task]] = (),
+) -> str:
+    """Return the clip URL once its synthesis is scheduled in the background.
+
+    `parts` are per-sentence clips already being synthesized for `text`;
+    when they cover it they are joined instead of speaking it again.
+    """
+    text = (text or "").strip()
+    if not text:
+        return ""
+
+    filename = _clip_name(session_id, q_index, kind)
+    marker = f"{_AUDIO_DIR_STR}/{filename}{_PENDING_SUFFIX}"
+    await _in_pool(_touch, marker)
+    event = _pending[filename] = asyncio.Event()
+    task = asyncio.create_task(
+        _do_synthesize(text, session_id, q_index, kind, cache, parts)
+    )
+    _SCHEDULED[filename] = task
+
+    def _done(t: asyncio.Task) -> None:
+        event.set()
+        if _pending.get(filename) is event:
+            del _pending[filename]
+        if _SCHEDULED.get(filename) is t:
+            del _SCHEDULED[filename]
+            _TTS_POOL.submit(_discard, marker)
+
+    task.add_done_callback(_done)
+    return f"/audio/{filename}"
+
+
+async def _do_synthesize(
+    text: str,
+    session_id: str,
+    q_index: int,
+    kind: str,
+    cache: bool,
+    parts: Sequence[Tuple[str, asyncio.Task]],
+) -> str:
+    try:
+        part_urls = list(await asyncio.gather(*(task for _, task in parts)))
+        if (
+            CAN_CONCAT_AUDIO
+            and part_urls
+            and all(part_urls)
+            and "".join(sentence for sentence, _ in parts).strip() == text
+        ):
+            return await concat_audio(part_urls, session_id, q_index, kind)
+
+        # Cached or fallback reply, or a stream that broke part-way: the
+        # partial clips are useless, so speak the final text in one go.
+        for url in part_urls:
+            if url:
+                _discard(f"{_AUDIO_DIR_STR}/{url.rsplit('/', 1)[-1]}")
+        return await synthesize_tts(text, session_id, q_index, kind, cache=cache)
+    except asyncio.CancelledError:
+        # Cancelled at finish: don't leave finished sentence clips behind.
+        for _, task in parts:
+            if task.done() and not task.cancelled() and task.result():
+                _discard(f"{_AUDIO_DIR_STR}/{task.result().rsplit('/', 1)[-1]}")
+        raise
     except Exception as e:
-        print(
-            f"[TTS] Error for session={session_id} q={q_index} kind={kind}: {repr(e)}"
+        log.error(
+            "[TTS] Error for session=%s q=%s kind=%s: %r", session_id, q_index, kind, e
         )
         return ""
+
+
+async def wait_for_clip(name: str, timeout: float = TTS_WAIT_TIMEOUT_SEC) -> str | None:
+    """Path of the finished clip `name` in AUDIO_DIR, waiting for it if scheduled.
+
+    Only top-level clip files are served: lock, part and marker files and the
+    cache directory are not, and neither is anything outside AUDIO_DIR.
+    """
+    if "/" in name or "\\" in name or not name.endswith(f".{_CFG.ext}"):
+        return None
+    path = f"{_AUDIO_DIR_STR}/{name}"
+
+    event = _pending.get(name)
+    if event is not None:
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return None
+    else:
+        # Possibly scheduled by another worker; its marker outlives the work.
+        marker = f"{path}{_PENDING_SUFFIX}"
+        deadline = asyncio.get_running_loop().time() + timeout
+        while await _in_pool(_awaiting, path, marker):
+            if asyncio.get_running_loop().time() >= deadline:
+                return None
+            await asyncio.sleep(_POLL_SEC)
+    return path if await _in_pool(os.path.isfile, path) else None
+
+
+async def drain_scheduled(
+    session_id: str, clip_names: Sequence[str], timeout: float = TTS_WAIT_TIMEOUT_SEC
+) -> None:
+    """Let the session's background clips land before its files are cleaned up.
+
+    Work still running after `timeout` is cancelled, and clips in `clip_names`
+    scheduled on other workers are waited for through their marker files.
+    """
+    prefix = f"{session_id}_"
+    tasks = [t for name, t in _SCHEDULED.items() if name.startswith(prefix)]
+    if tasks:
+        _, late = await asyncio.wait(tasks, timeout=timeout)
+        for task in late:
+            task.cancel()
+        if late:
+            await asyncio.wait(late)
+
+    markers = [f"{_AUDIO_DIR_STR}/{name}{_PENDING_SUFFIX}" for name in clip_names]
+    deadline = asyncio.get_running_loop().time() + timeout
+    while markers and await _in_pool(_any_live, markers):
+        if asyncio.get_running_loop().time() >= deadline:
+            break
+        await asyncio.sleep(_POLL_SEC)